@@ -1,9 +1,6 @@
 import os
-import shutil
-import re
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
+import threading
+from collections import Counter
 from datetime import datetime
 from file_categories import (
     FILE_PATTERNS,
@@ -11,13 +8,53 @@ from file_categories import (
     COMMON_PATTERNS,
     TRAINING_EXAMPLES
 )
+from compiled_model import CompiledModel, export_model, tokenize_filename
+from dedup import DuplicateStage
+from io_scheduler import IOScheduler
+from archive_inspect import archive_kind, dominant_category
+from retry_queue import RetryQueue
+from category_tables import extension_category
+
+# Classification stages ordered by cost, each with the confidence it must
+# exceed to decide the category on its own
+DEFAULT_CASCADE = (
+    ('extension', 0.9),  # Very high confidence for extension match
+    ('keyword', 0.8),
+    ('ml', 0.6),
+)
 
 class FileSorter:
-    def __init__(self):
+    def __init__(self, model_path=None, ngram_range=(1, 3), max_depth=10,
+                 min_samples_split=5, training_examples=TRAINING_EXAMPLES,
+                 cascade=DEFAULT_CASCADE):
         # Load patterns and keywords from dataset
         self.file_patterns = FILE_PATTERNS
         self.content_keywords = CONTENT_KEYWORDS
         self.common_patterns = COMMON_PATTERNS
+        self.training_examples = training_examples
+        
+        # Set up the classification cascade and its decision counters
+        stages = {
+            'extension': self._get_extension_category,
+            'keyword': self._get_keyword_category,
+            'ml': self._get_ml_category,
+        }
+        for name, _ in cascade:
+            if name not in stages:
+                raise ValueError(f"Unknown cascade stage: {name}")
+        self.cascade = [(name, stages[name], threshold) for name, threshold in cascade]
+        self.stage_stats = Counter()
+        
+        # A compiled model needs only numpy, so skip sklearn and training
+        if model_path:
+            self.vectorizer = None
+            self.clf = None
+            self.model = CompiledModel.load(model_path, self.common_patterns)
+            return
+        
+        # Imported lazily so compiled-model users never load sklearn/scipy
+        from sklearn.tree import DecisionTreeClassifier
+        from sklearn.feature_extraction.text import TfidfVectorizer
         
         # Create training data
         self._create_training_data()
@@ -26,41 +63,18 @@ class FileSorter:
         self.vectorizer = TfidfVectorizer(
             tokenizer=self._custom_tokenizer,
             token_pattern=None,
-            ngram_range=(1, 3)  # Increased to capture more context
+            ngram_range=ngram_range  # (1, 3) by default to capture more context
         )
         self.clf = DecisionTreeClassifier(
             random_state=42,
-            max_depth=10,  # Prevent overfitting
-            min_samples_split=5
+            max_depth=max_depth,  # Prevent overfitting
+            min_samples_split=min_samples_split
         )
         self._train_model()
 
     def _custom_tokenizer(self, text):
         """Custom tokenizer that handles special cases and patterns."""
-        # Convert to lowercase and split on common delimiters
-        tokens = re.split(r'[_\-.\s]', text.lower())
-        
-        # Extract date patterns
-        for date_pattern in self.common_patterns['dates']:
-            dates = re.findall(date_pattern, text)
-            if dates:
-                tokens.extend(['date_token'])
-        
-        # Extract version patterns
-        for version_pattern in self.common_patterns['versions']:
-            versions = re.findall(version_pattern, text)
-            if versions:
-                tokens.extend(['version_token'])
-        
-        # Extract status patterns
-        for status_pattern in self.common_patterns['status']:
-            statuses = re.findall(status_pattern, text.lower())
-            if statuses:
-                tokens.extend(['status_token'])
-        
-        # Remove empty tokens and duplicates
-        tokens = [t for t in tokens if t]
-        return list(dict.fromkeys(tokens))
+        return tokenize_filename(text, self.common_patterns)
 
     def _create_training_data(self):
         """Create comprehensive training data from patterns and keywords."""
@@ -117,7 +131,7 @@ class FileSorter:
                 self.categories.extend([category] * len(examples))
         
         # Add real-world examples from training dataset
-        for filename, category in TRAINING_EXAMPLES:
+        for filename, category in self.training_examples:
             self.file_names.append(filename)
             self.categories.append(category)
 
@@ -125,13 +139,21 @@ class FileSorter:
         """Train the classification model."""
         X = self.vectorizer.fit_transform(self.file_names)
         self.clf.fit(X, self.categories)
+        # Inference runs on the compiled arrays to skip sklearn's per-call overhead
+        self.model = CompiledModel.from_estimators(self.vectorizer, self.clf, self.common_patterns)
+
+    def export_model(self, path):
+        """Export the trained model as a numpy-only .npz artifact."""
+        if self.clf is None:
+            raise ValueError("Model was loaded from a compiled artifact; nothing to export")
+        export_model(self.vectorizer, self.clf, path)
 
     def _get_extension_category(self, filename):
         """Get category based on file extension."""
-        ext = os.path.splitext(filename)[1].lower()[1:]  # Remove the dot
-        for category, extensions in self.file_patterns.items():
-            if ext in extensions:
-                return category, 1.0  # High confidence for exact extension match
+        # O(1) lookup in the precompiled tables, including multi-part suffixes
+        category = extension_category(filename)
+        if category:
+            return category, 1.0  # High confidence for exact extension match
         return None, 0.0
 
     def _get_keyword_category(self, filename):
@@ -150,36 +172,83 @@ class FileSorter:
         
         return best_category, max_confidence
 
-    def predict_category(self, filename):
-        """Predict the category for a given filename using multiple methods."""
-        # Try extension-based categorization first
-        ext_category, ext_confidence = self._get_extension_category(filename)
-        if ext_confidence > 0.9:  # Very high confidence for extension match
-            return ext_category
-        
-        # Try keyword-based categorization
-        keyword_category, keyword_confidence = self._get_keyword_category(filename)
-        
-        # Get ML model prediction
-        features = self.vectorizer.transform([filename.lower()])
-        ml_category = self.clf.predict(features)[0]
-        probabilities = self.clf.predict_proba(features)[0]
-        ml_confidence = max(probabilities)
-        
-        # Weighted decision based on all methods
-        if ext_confidence > 0.9:
-            return ext_category
-        elif keyword_confidence > 0.8:
-            return keyword_category
-        elif ml_confidence > 0.6:
-            return ml_category
-        elif ext_category:
-            return ext_category
-        else:
-            return ml_category
-
-    def sort_files(self, source_dir, backup=True, progress_callback=None):
-        """Sort files in the source directory."""
+    def _get_ml_category(self, filename):
+        """Get category from the ML model."""
+        return self.model.predict_one(filename)
+
+    def predict_category(self, filename, run_stats=None):
+        """Predict the category for a given filename using multiple methods.
+
+        stage_stats keeps lifetime counts; run_stats, if given, counts one run.
+        """
+        category, stage_name = self._classify(filename)
+        self.stage_stats[stage_name] += 1
+        if run_stats is not None:
+            run_stats[stage_name] += 1
+        return category
+
+    def _classify(self, filename):
+        """Return (category, deciding stage name) without updating stage_stats."""
+        # Run stages cheapest first and stop at the first confident one
+        fallback = None
+        for name, stage, threshold in self.cascade:
+            category, confidence = stage(filename)
+            if category is None:
+                continue
+            if confidence > threshold:
+                return category, name
+            fallback = category
+        
+        # No stage was confident: use the last stage that had an answer
+        return fallback or 'other', 'fallback'
+
+    def format_stage_stats(self, stats=None):
+        """Summarize how often each cascade stage decided the category."""
+        stats = self.stage_stats if stats is None else stats
+        counts = [f"{name} {stats[name]}" for name, _, _ in self.cascade]
+        counts.append(f"fallback {stats['fallback']}")
+        return "Decided by: " + ", ".join(counts)
+
+    def predict_file_category(self, file_path, inspect_archives=False, run_stats=None):
+        """Predict the category of a file, optionally looking inside archives."""
+        filename = os.path.basename(file_path)
+        category = self.predict_category(filename, run_stats)
+        if inspect_archives and category == 'archives' and archive_kind(filename):
+            # Members are classified by name only, nothing is extracted, and
+            # left out of stage_stats so the counts stay per sorted file
+            content_category = dominant_category(
+                file_path, lambda names: [self._classify(n)[0] for n in names])
+            if content_category:
+                return content_category
+        return category
+
+    def iter_plan(self, source_dir, batch_size=1000, inspect_archives=False):
+        """Yield batches of (filename, category) for a directory without moving anything."""
+        batch = []
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    category = self.predict_file_category(entry.path, inspect_archives)
+                    batch.append((entry.name, category))
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def sort_files(self, source_dir, backup=True, progress_callback=None, dedup=None,
+                   scheduler=None, overrides=None, inspect_archives=False,
+                   retry_queue=None, only_files=None, backup_only=None):
+        """Sort files in the source directory.
+
+        dedup selects an optional duplicate policy: 'link', 'skip' or 'move'.
+        scheduler is an optional IOScheduler controlling move/backup I/O.
+        overrides maps filenames to categories chosen by the user.
+        inspect_archives sorts zip/tar archives by the category of their contents.
+        retry_queue is an optional RetryQueue for locked or busy files.
+        only_files restricts the run to these filenames (e.g. from a retry report).
+        backup_only lists paths of already sorted files that still need a backup copy.
+        """
         if not os.path.isdir(source_dir):
             raise ValueError(f"Directory not found: {source_dir}")
         
@@ -196,46 +265,123 @@ class FileSorter:
         # Get all files
         files = [f for f in os.listdir(source_dir) 
                 if os.path.isfile(os.path.join(source_dir, f))]
+        if only_files is not None:
+            only_files = set(only_files)
+            files = [f for f in files if f in only_files]
+        backup_only = [p for p in backup_only or [] if os.path.isfile(p)] if backup else []
         
-        if not files:
+        if not files and not backup_only:
             if progress_callback:
                 progress_callback("No files found to organize.")
             return
         
+        # Set byte-identical copies aside before anything is moved
+        dedup_stage = None
+        if dedup:
+            dedup_stage = DuplicateStage(dedup)
+            files = dedup_stage.scan(source_dir, files)
+            if progress_callback:
+                progress_callback(f"Found {len(dedup_stage.duplicates)} duplicate files")
+        
         total_files = len(files)
         processed_files = 0
+        destinations = {}
+        categories = {}
+        run_stats = Counter()  # This run only; stage_stats keeps lifetime totals
+        progress_lock = threading.Lock()
         
-        # Sort files
-        for filename in files:
-            try:
-                file_path = os.path.join(source_dir, filename)
-                category = self.predict_category(filename)
-                
-                # Create category folder
-                category_dir = os.path.join(source_dir, category)
-                os.makedirs(category_dir, exist_ok=True)
-                
-                # Move file
-                shutil.move(file_path, os.path.join(category_dir, filename))
-                
-                # Create backup
-                if backup:
-                    shutil.copy2(os.path.join(category_dir, filename),
-                               os.path.join(backup_dir, filename))
-                
+        def move_file(file_path):
+            """Move one file into its category folder and back it up."""
+            filename = os.path.basename(file_path)
+            category_dir = os.path.join(source_dir, categories[filename])
+            os.makedirs(category_dir, exist_ok=True)
+            # A retry may find the move already done and only the backup missing
+            if filename not in destinations:
+                scheduler.move(file_path, os.path.join(category_dir, filename))
+                destinations[filename] = os.path.join(category_dir, filename)
+            
+            # Create backup
+            if backup:
+                scheduler.copy2(os.path.join(category_dir, filename),
+                                os.path.join(backup_dir, filename))
+        
+        def file_done(file_path, error):
+            """Report a finished move from whichever I/O worker ran it."""
+            nonlocal processed_files
+            filename = os.path.basename(file_path)
+            with progress_lock:
+                if error:
+                    if progress_callback:
+                        progress_callback(f"! Failed to organize {filename}: {str(error)}")
+                    return
                 processed_files += 1
                 if progress_callback:
                     progress = (processed_files / total_files) * 100
-                    progress_callback(f"AI organizing: {filename} -> {category}/ ({int(progress)}%)")
-                
-            except Exception as e:
+                    progress_callback(f"AI organizing: {filename} -> {categories[filename]}/ ({int(progress)}%)")
+        
+        def backup_file(file_path):
+            """Back up a file that an earlier run sorted without a backup."""
+            scheduler.copy2(file_path, os.path.join(backup_dir, os.path.basename(file_path)))
+        
+        def backup_done(file_path, error):
+            """Report a finished backup-only copy."""
+            filename = os.path.basename(file_path)
+            with progress_lock:
                 if progress_callback:
-                    progress_callback(f"! Failed to organize {filename}: {str(e)}")
+                    if error:
+                        progress_callback(f"! Failed to back up {filename}: {str(error)}")
+                    else:
+                        progress_callback(f"Backed up: {filename}")
+        
+        # Classify everything first so the moves can be scheduled per device
+        scheduler = scheduler or IOScheduler()
+        retry_queue = retry_queue or RetryQueue()
+        move_done = retry_queue.handler(move_file, file_done, progress_callback,
+                                        lambda path: destinations.get(os.path.basename(path)))
+        copy_done = retry_queue.handler(backup_file, backup_done, progress_callback,
+                                        lambda path: path)
+        for file_path in backup_only:
+            try:
+                scheduler.submit(file_path, backup_file, copy_done)
+            except Exception as e:
+                copy_done(file_path, e)
+        for filename in files:
+            file_path = os.path.join(source_dir, filename)
+            try:
+                if overrides and filename in overrides:
+                    categories[filename] = overrides[filename]
+                else:
+                    categories[filename] = self.predict_file_category(
+                        file_path, inspect_archives, run_stats)
+                scheduler.submit(file_path, move_file, move_done)
+            except Exception as e:
+                move_done(file_path, e)
+        scheduler.run()
+        
+        # Locked or busy files get another go once everything else is done
+        retry_queue.run(progress_callback)
+        if retry_queue.failures:
+            report_path = retry_queue.write_report(source_dir)
+            if progress_callback:
+                progress_callback(f"{retry_queue.summary()}; retry report: {report_path}")
+        
+        if dedup_stage:
+            dedup_stage.finish(source_dir, destinations, progress_callback)
+            if progress_callback:
+                progress_callback(dedup_stage.summary())
+        
+        if progress_callback:
+            progress_callback(self.format_stage_stats(run_stats))
         
         if backup and progress_callback:
             progress_callback(f"✓ AI organization complete! Backup created in: {backup_dir}")
 
-def ai_based_sort(root_directory, progress_callback=None):
+def ai_based_sort(root_directory, progress_callback=None, model_path=None, dedup=None,
+                  scheduler=None, overrides=None, sorter=None, inspect_archives=False,
+                  retry_queue=None, only_files=None, backup_only=None):
     """Main function to perform AI-based file sorting."""
-    sorter = FileSorter()
-    sorter.sort_files(root_directory, progress_callback=progress_callback)
\ No newline at end of file
+    sorter = sorter or FileSorter(model_path=model_path)
+    sorter.sort_files(root_directory, progress_callback=progress_callback, dedup=dedup,
+                      scheduler=scheduler, overrides=overrides,
+                      inspect_archives=inspect_archives, retry_queue=retry_queue,
+                      only_files=only_files, backup_only=backup_only)
\ No newline at end of file
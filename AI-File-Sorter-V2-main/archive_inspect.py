@@ -0,0 +1,231 @@
+"""
+Archive inspection for the AI sorter.
+
+Reads only the member listing of an archive (the zip central directory, or tar
+headers) without extracting anything, so an archive full of photos or source
+code can be sorted by what it contains. Member, byte and decompressed-size
+limits keep the cost bounded on huge or highly compressed archives.
+"""
+
+import os
+import bz2
+import gzip
+import lzma
+import struct
+import tarfile
+import zipfile
+from collections import Counter
+
+MAX_MEMBERS = 1000
+MAX_BYTES = 4 * 1024 * 1024
+MAX_UNPACKED_BYTES = 64 * 1024 * 1024  # Decompressed tar data walked past at most
+MIN_SHARE = 0.5  # Dominant category must cover at least this share of members
+
+ZIP_SUFFIXES = ('.zip',)
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+_EOCD_SIGNATURE = b'PK\x05\x06'
+_EOCD_SIZE = 22
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_CENTRAL_SIZE = 46
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_LOCATOR_SIZE = 20
+_ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+_ZIP64_EOCD_SIZE = 56
+
+# Magic bytes of the compressed tar formats, and how to open each
+_DECOMPRESSORS = (
+    (b'\x1f\x8b', lambda f: gzip.GzipFile(fileobj=f, mode='rb')),
+    (b'BZh', bz2.BZ2File),
+    (b'\xfd7zXZ\x00', lzma.LZMAFile),
+)
+
+
+def archive_kind(filename):
+    """Return 'zip', 'tar' or None for archives whose listing can be read."""
+    name = filename.lower()
+    if name.endswith(ZIP_SUFFIXES):
+        return 'zip'
+    if name.endswith(TAR_SUFFIXES):
+        return 'tar'
+    return None
+
+
+def _zip_members(path, max_members, max_bytes):
+    """Read member names straight from the zip central directory."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        # The end-of-central-directory record sits in the last 64 KB + 22 bytes
+        tail_size = min(size, _EOCD_SIZE + 0xFFFF)
+        f.seek(size - tail_size)
+        tail = f.read(tail_size)
+        pos = tail.rfind(_EOCD_SIGNATURE)
+        if pos < 0:
+            raise zipfile.BadZipFile("End of central directory not found")
+        _, _, _, _, _, cd_size, cd_offset, _ = struct.unpack(
+            '<4s4H2LH', tail[pos:pos + _EOCD_SIZE])
+        # Prepended data (e.g. self-extracting stubs) shifts every offset, so
+        # the directory is found by its distance from the end record instead
+        cd_end = size - tail_size + pos
+        locator = tail[max(0, pos - _ZIP64_LOCATOR_SIZE):pos]
+        if locator[:4] == _ZIP64_LOCATOR_SIGNATURE and len(locator) == _ZIP64_LOCATOR_SIZE:
+            # Zip64 keeps the real directory size in a record before the locator
+            cd_end, cd_size = _zip64_directory(f, locator, cd_end)
+        elif cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF:
+            raise zipfile.BadZipFile("Zip64 end of central directory locator not found")
+        f.seek(cd_end - cd_size)
+        names = []
+        bytes_read = 0
+        while len(names) < max_members and bytes_read < max_bytes:
+            header = f.read(_CENTRAL_SIZE)
+            if len(header) < _CENTRAL_SIZE or header[:4] != _CENTRAL_SIGNATURE:
+                break
+            flags = struct.unpack('<H', header[8:10])[0]
+            name_len, extra_len, comment_len = struct.unpack('<3H', header[28:34])
+            raw_name = f.read(name_len)
+            f.seek(extra_len + comment_len, os.SEEK_CUR)
+            bytes_read += _CENTRAL_SIZE + name_len + extra_len + comment_len
+            name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace')
+            if not name.endswith('/'):
+                names.append(name)
+        return names
+
+
+def _zip64_directory(f, locator, eocd_offset):
+    """Return (end offset, size) of a Zip64 central directory from its end record."""
+    _, _, record_offset, _ = struct.unpack('<4sLQL', locator)
+    # The record normally sits right before the locator; fall back to the
+    # offset it names, which is only right when nothing was prepended
+    for offset in (eocd_offset - _ZIP64_LOCATOR_SIZE - _ZIP64_EOCD_SIZE, record_offset):
+        f.seek(offset)
+        record = f.read(_ZIP64_EOCD_SIZE)
+        if len(record) == _ZIP64_EOCD_SIZE and record[:4] == _ZIP64_EOCD_SIGNATURE:
+            cd_size = struct.unpack('<4sQ2H2L4Q', record)[8]
+            return offset, cd_size
+    raise zipfile.BadZipFile("Zip64 end of central directory record not found")
+
+
+class _ByteLimitReached(Exception):
+    pass
+
+
+class _CountingReader:
+    """File wrapper that stops reading once the byte budget is spent."""
+
+    def __init__(self, f, max_bytes):
+        self.f = f
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        # Compressed tars seek by decompressing, so one huge member could
+        # otherwise read far past the budget between two headers
+        if self.bytes_read >= self.max_bytes:
+            raise _ByteLimitReached()
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.f.seek(offset, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+    def seekable(self):
+        return True
+
+
+class _UnpackedLimit:
+    """Decompressed stream wrapper that refuses to go past max_bytes of tar data.
+
+    Skipping a member seeks the decompressor forward, which decompresses
+    everything in between, so seeks are checked as well as reads.
+    """
+
+    def __init__(self, f, max_bytes):
+        self.f = f
+        self.max_bytes = max_bytes
+
+    def read(self, size=-1):
+        if self.f.tell() >= self.max_bytes:
+            raise _ByteLimitReached()
+        return self.f.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.f.tell()
+        elif whence != os.SEEK_SET:
+            raise _ByteLimitReached()  # Seeking from the end decompresses everything
+        if offset > self.max_bytes:
+            raise _ByteLimitReached()
+        return self.f.seek(offset)
+
+    def tell(self):
+        return self.f.tell()
+
+    def seekable(self):
+        return True
+
+
+def _open_tar(reader, max_unpacked):
+    """Open a plain or compressed tar, bounding decompressed bytes for the latter."""
+    magic = reader.read(6)
+    reader.seek(0)
+    for prefix, opener in _DECOMPRESSORS:
+        if magic.startswith(prefix):
+            stream = _UnpackedLimit(opener(reader), max_unpacked)
+            return tarfile.open(fileobj=stream, mode='r:')
+    return tarfile.open(fileobj=reader, mode='r:')
+
+
+def _tar_members(path, max_members, max_bytes, max_unpacked=MAX_UNPACKED_BYTES):
+    """Walk tar headers, seeking over member data instead of extracting it."""
+    names = []
+    with open(path, 'rb') as raw:
+        reader = _CountingReader(raw, max_bytes)
+        try:
+            tar = _open_tar(reader, max_unpacked)
+            while len(names) < max_members:
+                member = tar.next()
+                if member is None:
+                    break
+                if member.isfile():
+                    names.append(member.name)
+        except _ByteLimitReached:
+            pass  # Keep the members listed before the budget ran out
+    return names
+
+
+def list_members(path, max_members=MAX_MEMBERS, max_bytes=MAX_BYTES):
+    """Return member file names of a zip or tar archive, within the limits."""
+    kind = archive_kind(path)
+    if kind == 'zip':
+        return _zip_members(path, max_members, max_bytes)
+    if kind == 'tar':
+        return _tar_members(path, max_members, max_bytes)
+    return []
+
+
+def dominant_category(path, classify_batch, max_members=MAX_MEMBERS,
+                      max_bytes=MAX_BYTES, min_share=MIN_SHARE):
+    """Classify an archive by its members.
+
+    classify_batch(names) must return one category per member name. Returns
+    the most common member category, or None when the archive cannot be read
+    or no category covers min_share of the members.
+    """
+    try:
+        members = list_members(path, max_members, max_bytes)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, struct.error,
+            lzma.LZMAError):
+        return None
+    names = [os.path.basename(m.rstrip('/')) for m in members]
+    names = [n for n in names if n]
+    if not names:
+        return None
+    category, count = Counter(classify_batch(names)).most_common(1)[0]
+    if count / len(names) < min_share:
+        return None
+    return category
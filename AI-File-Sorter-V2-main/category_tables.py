@@ -0,0 +1,73 @@
+"""
+Precompiled extension lookup tables shared by both sorters.
+
+Built once at import time from file_categories.py. Each extension maps to a
+ranked tuple of candidate categories: categories the training examples use
+for that extension come first (most examples first), and remaining ties keep
+FILE_PATTERNS order. Multi-part suffixes such as 'tar.gz' or 'compose.yaml'
+are matched before the last dot-separated part, as long as some of the name is
+left in front of them.
+"""
+
+from collections import Counter
+from types import MappingProxyType
+from file_categories import FILE_PATTERNS, COMPOUND_EXTENSIONS, TRAINING_EXAMPLES
+
+
+def _split(filename, known, max_parts):
+    """Longest suffix of filename found in known, else the last dot-separated part."""
+    parts = filename.lower().lstrip('.').split('.')
+    if len(parts) == 1:
+        return ''
+    # Keep at least one part in front, so 'compose.yaml' itself is a yaml file
+    for count in range(min(max_parts, len(parts) - 1), 1, -1):
+        suffix = '.'.join(parts[-count:])
+        if suffix in known:
+            return suffix
+    return parts[-1]
+
+
+def _build_tables():
+    candidates = {}
+    for patterns in (FILE_PATTERNS, COMPOUND_EXTENSIONS):
+        for category, extensions in patterns.items():
+            for ext in extensions:
+                ext = ext.lower()
+                if category not in candidates.setdefault(ext, []):
+                    candidates[ext].append(category)
+
+    max_parts = max(ext.count('.') + 1 for ext in candidates)
+
+    # Training examples show which reading of an ambiguous extension is meant
+    votes = Counter()
+    for filename, category in TRAINING_EXAMPLES:
+        votes[_split(filename, candidates, max_parts), category] += 1
+
+    ranked = {}
+    for ext, categories in candidates.items():
+        order = {category: i for i, category in enumerate(categories)}
+        ranked[ext] = tuple(sorted(categories, key=lambda c: (-votes[ext, c], order[c])))
+    return MappingProxyType(ranked), max_parts
+
+
+# extension -> ranked candidate categories, e.g. 'psd' -> ('design', 'images')
+EXTENSION_CATEGORIES, MAX_SUFFIX_PARTS = _build_tables()
+
+
+def split_extension(filename):
+    """Return the longest known suffix of a filename, lower-cased, without the dot.
+
+    Falls back to the text after the last dot, or '' when there is none.
+    """
+    return _split(filename, EXTENSION_CATEGORIES, MAX_SUFFIX_PARTS)
+
+
+def extension_categories(filename):
+    """Return the ranked candidate categories for a filename's extension."""
+    return EXTENSION_CATEGORIES.get(split_extension(filename), ())
+
+
+def extension_category(filename):
+    """Return the best category for a filename's extension, or None."""
+    candidates = extension_categories(filename)
+    return candidates[0] if candidates else None
@@ -0,0 +1,324 @@
+"""
+Local classification service that keeps one warm FileSorter.
+
+Clients talk newline-delimited JSON over a Unix domain socket (or localhost
+TCP where Unix sockets are unavailable). Each request is one JSON object and
+gets one JSON object back:
+
+    {"op": "classify", "filenames": ["report.pdf", ...]}  -> {"ok": true, "categories": [...]}
+    {"op": "sort", "directory": "...", "dedup": "skip"}   -> {"ok": true, "messages": [...]}
+    {"op": "health"}                                      -> {"ok": true, "status": "ok", ...}
+    {"op": "stats"}                                       -> {"ok": true, ...}
+
+Classify requests from all clients are funnelled through one batching thread,
+so concurrent callers share a single pass over the model.
+
+Example:
+    python classify_service.py --socket /tmp/ai-file-sorter.sock --model model.npz
+"""
+
+import os
+import sys
+import stat
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+from advanced_sort import FileSorter
+
+DEFAULT_SOCKET = '/tmp/ai-file-sorter.sock'
+DEFAULT_PORT = 8765
+MAX_BATCH = 512       # Filenames classified per batch
+MAX_WAIT = 0.002      # Seconds to wait for other clients to join a batch
+LISTEN_BACKLOG = 128  # Pending connections before clients are refused
+
+
+class _Request:
+    """A pending classify request waiting for its batch to run."""
+
+    def __init__(self, filenames):
+        self.filenames = filenames
+        self.categories = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class Batcher(threading.Thread):
+    """Collects classify requests from all clients and runs them in batches."""
+
+    def __init__(self, sorter, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        super().__init__(daemon=True)
+        self.sorter = sorter
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.classified = 0
+
+    def submit(self, filenames):
+        """Classify filenames, blocking until their batch has run."""
+        request = _Request(filenames)
+        self.pending.put(request)
+        request.done.wait()
+        if request.error:
+            raise request.error
+        return request.categories
+
+    def stop(self):
+        self.pending.put(None)
+
+    def _collect(self, first):
+        """Gather more requests until the batch is full or the wait expires."""
+        batch = [first]
+        size = len(first.filenames)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self.pending.put(None)  # Let run() see the stop signal
+                break
+            batch.append(request)
+            size += len(request.filenames)
+        return batch
+
+    def run(self):
+        while True:
+            first = self.pending.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            # Identical names across clients are classified once per batch
+            results = {}
+            for request in batch:
+                try:
+                    for filename in request.filenames:
+                        if filename not in results:
+                            results[filename] = self.sorter.predict_category(filename)
+                    request.categories = [results[f] for f in request.filenames]
+                except Exception as e:
+                    request.error = e
+                request.done.set()
+            self.batches += 1
+            self.classified += len(results)
+
+
+class ClassificationService:
+    """Request dispatch and statistics for one warm FileSorter."""
+
+    def __init__(self, sorter=None, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.sorter = sorter or FileSorter()
+        self.batcher = Batcher(self.sorter, max_batch, max_wait)
+        self.started = time.time()
+        self.requests = 0
+        self.sort_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+
+    def handle(self, request):
+        """Dispatch one decoded request and return the response object."""
+        with self.stats_lock:
+            self.requests += 1
+        op = request.get('op')
+        if op == 'classify':
+            filenames = request.get('filenames')
+            if not isinstance(filenames, list) or not all(isinstance(f, str) for f in filenames):
+                raise ValueError("'filenames' must be a list of strings")
+            return {'ok': True, 'categories': self.batcher.submit(filenames)}
+        if op == 'sort':
+            return {'ok': True, 'messages': self._sort(request)}
+        if op == 'health':
+            return {'ok': True, 'status': 'ok', 'uptime': time.time() - self.started}
+        if op == 'stats':
+            return dict(self.stats(), ok=True)
+        raise ValueError(f"Unknown op: {op}")
+
+    def _sort(self, request):
+        """Run a sort job with the warm model, one job at a time."""
+        directory = request.get('directory')
+        if not directory:
+            raise ValueError("'directory' is required")
+        messages = []
+        with self.sort_lock:
+            self.sorter.sort_files(directory, backup=request.get('backup', True),
+                                   progress_callback=messages.append,
+                                   dedup=request.get('dedup'))
+        return messages
+
+    def stats(self):
+        """Service counters, batching efficiency and cascade stage counts."""
+        batches = self.batcher.batches
+        return {
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+            'batches': batches,
+            'classified': self.batcher.classified,
+            'avg_batch': self.batcher.classified / batches if batches else 0.0,
+            'queued': self.batcher.pending.qsize(),
+            'stages': dict(self.sorter.stage_stats),
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Reads JSON lines from one client connection and answers each in turn."""
+
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = service.handle(json.loads(line))
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+        request_queue_size = LISTEN_BACKLOG
+else:
+    _UnixServer = None
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = LISTEN_BACKLOG
+
+
+def _remove_stale_socket(path):
+    """Remove a leftover socket file, refusing to touch anything else at path."""
+    if not os.path.lexists(path):
+        return
+    if not stat.S_ISSOCK(os.lstat(path).st_mode):
+        raise FileExistsError(f"Not a socket, refusing to replace: {path}")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(path)  # Nobody is listening: stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    raise OSError(f"Another service is already listening on {path}")
+
+
+class ClassificationServer:
+    """Serves a ClassificationService on a Unix socket path or localhost port."""
+
+    def __init__(self, service=None, socket_path=None, port=None):
+        self.service = service or ClassificationService()
+        if port is None and _UnixServer is not None:
+            self.address = socket_path or DEFAULT_SOCKET
+            _remove_stale_socket(self.address)
+            self.server = _UnixServer(self.address, _Handler)
+        else:
+            # Loopback only: the service is meant for local tools
+            self.server = _TCPServer(('127.0.0.1', port or DEFAULT_PORT), _Handler)
+            self.address = self.server.server_address
+        self.server.service = self.service
+        self.thread = None
+
+    def serve_forever(self):
+        self.service.batcher.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self._close()
+
+    def start(self):
+        """Serve from a background thread (useful for local clients and tests)."""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        if self.thread:
+            self.thread.join()
+
+    def _close(self):
+        self.service.batcher.stop()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.lexists(self.address) \
+                and stat.S_ISSOCK(os.lstat(self.address).st_mode):
+            os.remove(self.address)
+
+
+class ServiceClient:
+    """Minimal blocking client for the classification service."""
+
+    def __init__(self, address=DEFAULT_SOCKET, timeout=30.0):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Connect in blocking mode so a busy backlog waits instead of
+        # failing with EAGAIN, then apply the timeout to requests
+        self.sock.connect(address)
+        self.sock.settimeout(timeout)
+        self.file = self.sock.makefile('rwb')
+
+    def request(self, **request):
+        self.file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Service closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'request failed'))
+        return response
+
+    def classify(self, filenames):
+        return self.request(op='classify', filenames=list(filenames))['categories']
+
+    def sort(self, directory, backup=True, dedup=None):
+        return self.request(op='sort', directory=directory, backup=backup, dedup=dedup)['messages']
+
+    def health(self):
+        return self.request(op='health')
+
+    def stats(self):
+        return self.request(op='stats')
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve file classification from a warm model.")
+    parser.add_argument('--socket', default=None, help=f"Unix socket path (default {DEFAULT_SOCKET})")
+    parser.add_argument('--port', type=int, default=None, help="serve on 127.0.0.1:PORT instead")
+    parser.add_argument('--model', default=None, help="compiled model (.npz) to load instead of training")
+    args = parser.parse_args()
+
+    service = ClassificationService(FileSorter(model_path=args.model))
+    server = ClassificationServer(service, socket_path=args.socket, port=args.port)
+    print(f"Serving on {server.address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Dependency-free inference for the AI file sorter.
+
+The fitted TfidfVectorizer + DecisionTreeClassifier from advanced_sort are
+compiled into a small array-backed artifact (.npz) that can be evaluated with
+numpy only. Loading it avoids importing scikit-learn/scipy entirely, which keeps
+start-up fast and resident memory low for long-running processes.
+"""
+
+import math
+import re
+import numpy as np
+from file_categories import COMMON_PATTERNS
+
+FORMAT_VERSION = 1
+
+
+def tokenize_filename(text, common_patterns=COMMON_PATTERNS):
+    """Custom tokenizer that handles special cases and patterns."""
+    # Convert to lowercase and split on common delimiters
+    tokens = re.split(r'[_\-.\s]', text.lower())
+
+    # Extract date patterns
+    for date_pattern in common_patterns['dates']:
+        dates = re.findall(date_pattern, text)
+        if dates:
+            tokens.extend(['date_token'])
+
+    # Extract version patterns
+    for version_pattern in common_patterns['versions']:
+        versions = re.findall(version_pattern, text)
+        if versions:
+            tokens.extend(['version_token'])
+
+    # Extract status patterns
+    for status_pattern in common_patterns['status']:
+        statuses = re.findall(status_pattern, text.lower())
+        if statuses:
+            tokens.extend(['status_token'])
+
+    # Remove empty tokens and duplicates
+    tokens = [t for t in tokens if t]
+    return list(dict.fromkeys(tokens))
+
+
+def compile_arrays(vectorizer, clf):
+    """Flatten a fitted vectorizer and decision tree into plain arrays."""
+    if vectorizer.norm != 'l2' or vectorizer.sublinear_tf or vectorizer.binary:
+        raise ValueError("Only l2-normalised, non-sublinear TF-IDF can be exported")
+
+    # Vocabulary terms ordered by feature index
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, index in vectorizer.vocabulary_.items():
+        terms[index] = term
+
+    tree = clf.tree_
+    # Store per-node class probabilities so loading does not depend on how
+    # the installed scikit-learn version scales tree_.value
+    value = tree.value[:, 0, :].astype(np.float64)
+    totals = value.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    proba = value / totals
+
+    return dict(
+        format_version=np.array(FORMAT_VERSION),
+        terms=np.array(terms, dtype=str),
+        idf=np.asarray(vectorizer.idf_, dtype=np.float64),
+        ngram_range=np.array(vectorizer.ngram_range, dtype=np.int64),
+        lowercase=np.array(bool(vectorizer.lowercase)),
+        classes=np.array(clf.classes_, dtype=str),
+        children_left=tree.children_left.astype(np.int32),
+        children_right=tree.children_right.astype(np.int32),
+        feature=tree.feature.astype(np.int32),
+        threshold=tree.threshold.astype(np.float64),
+        proba=proba,
+    )
+
+
+def export_model(vectorizer, clf, path):
+    """Compile a fitted vectorizer and decision tree into an .npz artifact."""
+    np.savez_compressed(path, **compile_arrays(vectorizer, clf))
+
+
+class CompiledModel:
+    """Numpy-only predictor equivalent to the exported sklearn pipeline."""
+
+    def __init__(self, terms, idf, ngram_range, lowercase, classes,
+                 children_left, children_right, feature, threshold, proba,
+                 common_patterns=COMMON_PATTERNS):
+        self.vocabulary = {term: index for index, term in enumerate(terms)}
+        self.idf = idf.tolist()
+        self.min_n, self.max_n = int(ngram_range[0]), int(ngram_range[1])
+        self.lowercase = bool(lowercase)
+        self.classes = [str(c) for c in classes]
+        self.common_patterns = common_patterns
+
+        # Plain lists are much faster than numpy scalars for per-node access
+        self._left = children_left.tolist()
+        self._right = children_right.tolist()
+        self._feature = feature.tolist()
+        self._threshold = threshold.tolist()
+        self._proba = proba
+
+    @classmethod
+    def from_arrays(cls, data, common_patterns=COMMON_PATTERNS):
+        """Build a predictor from the arrays produced by compile_arrays."""
+        if int(data['format_version']) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format: {int(data['format_version'])}")
+        return cls(
+            data['terms'], data['idf'], data['ngram_range'], data['lowercase'],
+            data['classes'], data['children_left'], data['children_right'],
+            data['feature'], data['threshold'], data['proba'],
+            common_patterns=common_patterns,
+        )
+
+    @classmethod
+    def from_estimators(cls, vectorizer, clf, common_patterns=COMMON_PATTERNS):
+        """Compile fitted sklearn estimators in memory."""
+        return cls.from_arrays(compile_arrays(vectorizer, clf), common_patterns)
+
+    @classmethod
+    def load(cls, path, common_patterns=COMMON_PATTERNS):
+        """Load a compiled model written by export_model."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data, common_patterns)
+
+    def _ngrams(self, tokens):
+        """Expand tokens into word n-grams the same way TfidfVectorizer does."""
+        min_n, max_n = self.min_n, self.max_n
+        if max_n == 1:
+            return tokens
+        original = tokens
+        tokens = list(original) if min_n == 1 else []
+        if min_n == 1:
+            min_n += 1
+        n_original = len(original)
+        for n in range(min_n, min(max_n + 1, n_original + 1)):
+            for i in range(n_original - n + 1):
+                tokens.append(" ".join(original[i:i + n]))
+        return tokens
+
+    def features(self, filename):
+        """Return the sparse TF-IDF row for a filename as {index: value}."""
+        text = filename.lower() if self.lowercase else filename
+        counts = {}
+        for term in self._ngrams(tokenize_filename(text, self.common_patterns)):
+            index = self.vocabulary.get(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+
+        # Sum squares in column order, as sklearn does, to match it bit for bit
+        row = {index: count * self.idf[index] for index, count in sorted(counts.items())}
+        norm = 0.0
+        for value in row.values():
+            norm += value * value
+        if norm > 0.0:
+            norm = math.sqrt(norm)
+            row = {index: value / norm for index, value in row.items()}
+        # The tree compares float32 features against float64 thresholds
+        return {index: float(np.float32(value)) for index, value in row.items()}
+
+    def _leaf(self, row):
+        """Walk the tree to the leaf reached by a feature row."""
+        node = 0
+        left, right = self._left, self._right
+        while left[node] != -1:
+            if row.get(self._feature[node], 0.0) <= self._threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        return node
+
+    def predict_proba_one(self, filename):
+        """Return the class probability vector for one filename."""
+        return self._proba[self._leaf(self.features(filename))]
+
+    def predict_one(self, filename):
+        """Return (category, confidence) for one filename."""
+        probabilities = self.predict_proba_one(filename)
+        best = int(np.argmax(probabilities))
+        return self.classes[best], float(probabilities[best])
+
+    def predict_proba(self, filenames):
+        """Return an (n_files, n_classes) probability matrix."""
+        return np.array([self.predict_proba_one(f) for f in filenames])
+
+    def predict(self, filenames):
+        """Return the predicted category for each filename."""
+        return [self.predict_one(f)[0] for f in filenames]
+
+
+def load_model(path):
+    """Load a compiled model artifact."""
+    return CompiledModel.load(path)
+
+
+if __name__ == "__main__":
+    import sys
+    from advanced_sort import FileSorter
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: python compiled_model.py OUTPUT.npz")
+    FileSorter().export_model(sys.argv[1])
+    print(f"Compiled model written to {sys.argv[1]}")
@@ -0,0 +1,166 @@
+"""
+Duplicate-file detection for the sorters.
+
+Candidates are narrowed in three passes: equal size, equal hash of the first
+block, and finally equal hash of the whole file. Full hashes are computed in
+parallel over memory-mapped files, so only files that survive the cheap passes
+are read completely.
+"""
+
+import os
+import mmap
+import shutil
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+DEDUP_POLICIES = ('link', 'skip', 'move')
+DUPLICATES_FOLDER = 'duplicates'
+PARTIAL_BLOCK_SIZE = 64 * 1024
+
+
+def _partial_hash(path, block_size=PARTIAL_BLOCK_SIZE):
+    """Hash the first block of a file."""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(block_size)).hexdigest()
+
+
+def _full_hash(path):
+    """Hash a whole file through a read-only memory map."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # hashlib releases the GIL on large buffers, so threads scale
+            return hashlib.blake2b(mm).hexdigest()
+
+
+def _readable(key_func):
+    """Wrap key_func so a file that cannot be read gets no key instead of raising."""
+    def key(path):
+        try:
+            return key_func(path)
+        except OSError:
+            return None  # Locked or vanished: left to the normal move/retry path
+    return key
+
+
+def _keeper_order(path):
+    """Prefer the shortest name, so 'report.pdf' wins over 'report (1).pdf'."""
+    name = os.path.basename(path)
+    return (len(name), name)
+
+
+def _group_by(paths, key_func, executor=None):
+    """Split paths into groups with equal keys, dropping singletons and unreadable files."""
+    key_func = _readable(key_func)
+    keys = executor.map(key_func, paths) if executor else map(key_func, paths)
+    groups = defaultdict(list)
+    for path, key in zip(paths, keys):
+        if key is not None:
+            groups[key].append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(paths, max_workers=None, block_size=PARTIAL_BLOCK_SIZE):
+    """Group byte-identical files; each group is ordered with the keeper first."""
+    by_size = defaultdict(list)
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue  # Sorted normally, where the retry queue can deal with it
+        if size > 0:  # Empty files cannot be memory-mapped and save nothing
+            by_size[size].append(path)
+
+    duplicates = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for size, candidates in by_size.items():
+            if len(candidates) < 2:
+                continue
+            for group in _group_by(candidates, lambda p: _partial_hash(p, block_size)):
+                # The first block already covers small files completely
+                if size > block_size:
+                    groups = _group_by(group, _full_hash, executor)
+                else:
+                    groups = [group]
+                duplicates.extend(sorted(g, key=_keeper_order) for g in groups)
+    return duplicates
+
+
+def _format_size(num_bytes):
+    """Format a byte count for progress messages."""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+class DuplicateStage:
+    """Optional dedup stage shared by the simple and AI sorters."""
+
+    def __init__(self, policy='skip', max_workers=None):
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown duplicate policy: {policy}")
+        self.policy = policy
+        self.max_workers = max_workers
+        self.duplicates = {}  # duplicate filename -> keeper filename
+        self.sizes = {}
+        self.groups = 0
+        self.handled = 0
+        self.bytes_saved = 0
+
+    def scan(self, root_dir, filenames):
+        """Find duplicates and return the filenames that should be sorted."""
+        paths = [os.path.join(root_dir, f) for f in filenames]
+        for group in find_duplicates(paths, max_workers=self.max_workers):
+            try:
+                size = os.path.getsize(group[0])  # Every file in a group has the same size
+            except OSError:
+                continue  # Vanished since hashing: sort the group as ordinary files
+            self.groups += 1
+            keeper = os.path.basename(group[0])
+            for path in group[1:]:
+                name = os.path.basename(path)
+                self.duplicates[name] = keeper
+                self.sizes[name] = size
+        return [f for f in filenames if f not in self.duplicates]
+
+    def finish(self, root_dir, destinations, progress_callback=None):
+        """Apply the policy to every duplicate once the keepers have been moved.
+
+        destinations maps each moved keeper filename to its new path. The
+        'link' policy links a duplicate into its keeper's folder, so both
+        copies always end up in the same category.
+        """
+        for filename, keeper in self.duplicates.items():
+            file_path = os.path.join(root_dir, filename)
+            try:
+                if self.policy == 'skip':
+                    message = f"Duplicate of {keeper}, skipped: {filename}"
+                elif self.policy == 'move':
+                    dup_dir = os.path.join(root_dir, DUPLICATES_FOLDER)
+                    os.makedirs(dup_dir, exist_ok=True)
+                    shutil.move(file_path, os.path.join(dup_dir, filename))
+                    message = f"Duplicate of {keeper}: {filename} -> {DUPLICATES_FOLDER}/"
+                else:
+                    keeper_path = destinations.get(keeper)
+                    if keeper_path is None:
+                        raise ValueError(f"original {keeper} was not organized")
+                    target_dir = os.path.dirname(keeper_path)
+                    # Link first so the name is never lost if linking fails
+                    os.link(keeper_path, os.path.join(target_dir, filename))
+                    os.remove(file_path)
+                    message = (f"Duplicate of {keeper}, linked: {filename} -> "
+                               f"{os.path.basename(target_dir)}/")
+                self.handled += 1
+                self.bytes_saved += self.sizes[filename]
+                if progress_callback:
+                    progress_callback(message)
+            except Exception as e:
+                if progress_callback:
+                    progress_callback(f"! Failed to handle duplicate {filename}: {str(e)}")
+
+    def summary(self):
+        """Return a one-line dedup report."""
+        return (f"✓ Duplicates: {self.handled} of {len(self.duplicates)} handled "
+                f"({self.policy}) in {self.groups} groups, "
+                f"{_format_size(self.bytes_saved)} saved")
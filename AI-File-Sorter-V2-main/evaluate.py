@@ -0,0 +1,251 @@
+"""
+Accuracy and latency evaluation for the AI file sorter.
+
+A held-out set is carved out of TRAINING_EXAMPLES (the models under test are
+trained without it) and widened with generated variants of each held-out name.
+For every model variant the harness reports accuracy and per-category
+precision/recall of each decision path (extension, keyword and ML stages on
+their own, and the full cascade), a confusion matrix for the cascade and
+p50/p99 per-file latency of each path. The extension stage decides most names,
+so the ML path numbers are the ones that tell model settings apart.
+
+Example:
+    python evaluate.py --variant max_depth=10 --variant max_depth=20,ngram_range=1-2
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from advanced_sort import FileSorter
+from file_categories import TRAINING_EXAMPLES
+
+DEFAULT_VARIANTS = [
+    {},  # Current production settings
+    {'max_depth': 20},
+    {'ngram_range': (1, 2)},
+]
+PATHS = ('extension', 'keyword', 'ml', 'total')
+
+
+def split_examples(examples=TRAINING_EXAMPLES, test_fraction=0.25, seed=42):
+    """Deterministically split labelled examples into train and held-out lists."""
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    n_test = max(1, int(len(shuffled) * test_fraction))
+    return shuffled[n_test:], shuffled[:n_test]
+
+
+def generate_variants(filename):
+    """Return realistic renamings of a filename that keep its category."""
+    stem, dot, ext = filename.rpartition('.')
+    if not dot:
+        stem, ext = filename, ''
+    suffix = f".{ext}" if ext else ''
+    return [
+        filename,
+        f"{stem.replace('-', '_')}{suffix}",
+        f"{stem.replace('-', ' ')}{suffix}",
+        f"final_{stem}{suffix}",
+        f"{stem}_v2{suffix}",
+        f"{stem}-2024-03-15{suffix}",
+        f"{stem.upper()}{suffix.upper()}",
+        f"{stem} (1){suffix}",
+    ]
+
+
+def build_test_set(held_out):
+    """Expand held-out examples into a labelled test set without repeats."""
+    seen = set()
+    test_set = []
+    for filename, category in held_out:
+        for variant in generate_variants(filename):
+            if variant not in seen:
+                seen.add(variant)
+                test_set.append((variant, category))
+    return test_set
+
+
+def parse_variant(text):
+    """Parse 'max_depth=20,ngram_range=1-2' into FileSorter keyword arguments."""
+    variant = {}
+    for item in filter(None, text.split(',')):
+        key, _, value = item.partition('=')
+        if key == 'ngram_range':
+            low, _, high = value.partition('-')
+            variant[key] = (int(low), int(high or low))
+        elif key in ('max_depth', 'min_samples_split'):
+            variant[key] = None if value == 'None' else int(value)
+        else:
+            raise ValueError(f"Unknown model setting: {key}")
+    return variant
+
+
+def variant_name(variant):
+    """Short label for a model variant."""
+    if not variant:
+        return 'default'
+    return ','.join(f"{k}={'-'.join(map(str, v)) if isinstance(v, tuple) else v}"
+                    for k, v in sorted(variant.items()))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _timed(func, filename):
+    """Call func(filename) and return (result, elapsed microseconds)."""
+    start = time.perf_counter_ns()
+    result = func(filename)
+    return result, (time.perf_counter_ns() - start) / 1000
+
+
+def evaluate_sorter(sorter, test_set):
+    """Run the test set through each decision path and collect predictions and timings.
+
+    Returns ({path: predictions}, {path: latencies}). A stage's prediction is
+    None where it has no answer for a name.
+    """
+    paths = {
+        'extension': sorter._get_extension_category,
+        'keyword': sorter._get_keyword_category,
+        'ml': sorter.model.predict_one,
+        'total': sorter.predict_category,
+    }
+    latencies = {name: [] for name in PATHS}
+    predictions = {name: [] for name in PATHS}
+    for filename, _ in test_set:
+        for name in PATHS:
+            result, elapsed = _timed(paths[name], filename)
+            latencies[name].append(elapsed)
+            # Stages return (category, confidence), the cascade just the category
+            predictions[name].append(result[0] if isinstance(result, tuple) else result)
+    return predictions, latencies
+
+
+def _answered(labels, predictions):
+    """Keep the (label, prediction) pairs where the path gave an answer."""
+    return [(l, p) for l, p in zip(labels, predictions) if p is not None]
+
+
+def path_accuracy(labels, predictions):
+    """Return (accuracy on answered cases, share of cases answered) for one path."""
+    pairs = _answered(labels, predictions)
+    if not pairs:
+        return 0.0, 0.0
+    return sum(l == p for l, p in pairs) / len(pairs), len(pairs) / len(labels)
+
+
+def classification_report(labels, predictions):
+    """Per-category precision, recall and support."""
+    true_pos = Counter()
+    predicted = Counter(predictions)
+    actual = Counter(labels)
+    for label, prediction in zip(labels, predictions):
+        if label == prediction:
+            true_pos[label] += 1
+    report = {}
+    for category in sorted(set(labels) | set(predictions)):
+        precision = true_pos[category] / predicted[category] if predicted[category] else 0.0
+        recall = true_pos[category] / actual[category] if actual[category] else 0.0
+        report[category] = (precision, recall, actual[category])
+    return report
+
+
+def confusion_matrix(labels, predictions):
+    """Return (categories, matrix) with rows as true and columns as predicted."""
+    categories = sorted(set(labels) | set(predictions))
+    index = {c: i for i, c in enumerate(categories)}
+    matrix = [[0] * len(categories) for _ in categories]
+    for label, prediction in zip(labels, predictions):
+        matrix[index[label]][index[prediction]] += 1
+    return categories, matrix
+
+
+def format_results(name, labels, predictions, latencies):
+    """Render the full report for one model variant."""
+    lines = [f"=== {name} ==="]
+    # Each stage is scored on the names it answers; 'answered' shows how many
+    reports = {}
+    for path in PATHS:
+        pairs = _answered(labels, predictions[path])
+        reports[path] = classification_report([l for l, _ in pairs], [p for _, p in pairs])
+    lines.append(f"{'':<16}" + "".join(f"{path:>16}" for path in PATHS))
+    lines.append(f"{'category':<16}" + f"{'prec':>10}{'rec':>6}" * len(PATHS) + f"{'support':>9}")
+    for category in sorted(set(labels) | set().union(*reports.values())):
+        cells = ""
+        for path in PATHS:
+            precision, recall, _ = reports[path].get(category, (0.0, 0.0, 0))
+            cells += f"{precision:>10.2f}{recall:>6.2f}"
+        lines.append(f"{category:<16}{cells}{labels.count(category):>9}")
+    accuracies = [path_accuracy(labels, predictions[path]) for path in PATHS]
+    lines.append(f"{'accuracy':<16}" + "".join(f"{a:>16.3f}" for a, _ in accuracies))
+    lines.append(f"{'answered':<16}" + "".join(f"{c:>16.1%}" for _, c in accuracies))
+
+    categories, matrix = confusion_matrix(labels, predictions['total'])
+    lines.append("")
+    lines.append("Cascade confusion matrix (rows: true, columns: predicted)")
+    lines.append(" " * 4 + "".join(f"{i:>4}" for i in range(len(categories))))
+    for i, row in enumerate(matrix):
+        cells = "".join(f"{v:>4}" if v else "   ." for v in row)
+        lines.append(f"{i:>4}{cells}  {categories[i]}")
+
+    lines.append("")
+    lines.append(f"{'path':<12}{'p50 (us)':>10}{'p99 (us)':>10}")
+    for path in PATHS:
+        lines.append(f"{path:<12}{percentile(latencies[path], 50):>10.1f}"
+                     f"{percentile(latencies[path], 99):>10.1f}")
+    return "\n".join(lines)
+
+
+def run(variants=DEFAULT_VARIANTS, test_fraction=0.25, seed=42):
+    """Evaluate each variant on the same held-out set and return summary rows."""
+    train, held_out = split_examples(TRAINING_EXAMPLES, test_fraction, seed)
+    test_set = build_test_set(held_out)
+    summary = []
+    for variant in variants:
+        start = time.perf_counter()
+        sorter = FileSorter(training_examples=train, **variant)
+        train_seconds = time.perf_counter() - start
+
+        # Drop generated names that happen to be in the template training data
+        known = set(sorter.file_names)
+        cases = [(f, c) for f, c in test_set if f not in known]
+        labels = [c for _, c in cases]
+        predictions, latencies = evaluate_sorter(sorter, cases)
+
+        name = variant_name(variant)
+        print(format_results(name, labels, predictions, latencies))
+        print(sorter.format_stage_stats())
+        print()
+        accuracy, _ = path_accuracy(labels, predictions['total'])
+        ml_accuracy, _ = path_accuracy(labels, predictions['ml'])
+        summary.append((name, len(cases), accuracy, ml_accuracy, train_seconds,
+                        percentile(latencies['ml'], 50), percentile(latencies['ml'], 99),
+                        percentile(latencies['total'], 50), percentile(latencies['total'], 99)))
+
+    print(f"{'variant':<28}{'cases':>7}{'accuracy':>10}{'ml acc':>9}{'train s':>9}"
+          f"{'ml p50':>9}{'ml p99':>9}{'all p50':>9}{'all p99':>9}")
+    for row in summary:
+        print(f"{row[0]:<28}{row[1]:>7}{row[2]:>10.3f}{row[3]:>9.3f}{row[4]:>9.2f}"
+              f"{row[5]:>9.1f}{row[6]:>9.1f}{row[7]:>9.1f}{row[8]:>9.1f}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate file classifier accuracy and latency.")
+    parser.add_argument('--variant', action='append', type=parse_variant,
+                        help="model settings, e.g. max_depth=20,ngram_range=1-2 (repeatable)")
+    parser.add_argument('--test-fraction', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.variant or DEFAULT_VARIANTS, args.test_fraction, args.seed)
+
+
+if __name__ == "__main__":
+    main()
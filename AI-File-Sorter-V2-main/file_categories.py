@@ -55,6 +55,12 @@ FILE_PATTERNS = {
     'cad': ['dwg', 'dxf', 'step', 'stp', 'iges', 'ipt', 'iam', 'catpart']
 }
 
+# Multi-part extensions recognised by the lookup tables (not used for training)
+COMPOUND_EXTENSIONS = {
+    'archives': ['tar.gz', 'tar.bz2', 'tar.xz', 'tar.zst'],
+    'container': ['compose.yml'],
+}
+
 # Keywords for content-based categorization
 CONTENT_KEYWORDS = {
     'documents': [
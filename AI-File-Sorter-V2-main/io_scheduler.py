@@ -0,0 +1,152 @@
+"""
+Per-device I/O scheduling for move and backup work.
+
+Jobs are queued per storage device (st_dev) and each device is served by its
+own small pool of workers, so a slow disk never holds up another one. Within a
+device, small files go first (or are interleaved with large ones) so progress
+keeps moving while multi-GB copies run, and an optional per-device bandwidth
+limit keeps a sort from starving other workloads on the same disk.
+"""
+
+import os
+import time
+import shutil
+import threading
+from collections import deque
+
+IO_ORDERS = ('small_first', 'interleave', 'fifo')
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class _TokenBucket:
+    """Paces byte transfers to an average rate shared by all workers of a device."""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.available_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, num_bytes):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.available_at)
+            self.available_at = start + num_bytes / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class IOJob:
+    """One unit of file work queued on the device that holds its source."""
+
+    __slots__ = ('path', 'size', 'device', 'action', 'on_done')
+
+    def __init__(self, path, size, device, action, on_done):
+        self.path = path
+        self.size = size
+        self.device = device
+        self.action = action
+        self.on_done = on_done
+
+
+class IOScheduler:
+    """Runs queued file jobs with per-device queues and concurrency limits.
+
+    concurrency is the number of simultaneous jobs per device, order is one of
+    IO_ORDERS and bandwidth is an optional bytes-per-second cap per device.
+    """
+
+    def __init__(self, concurrency=2, order='small_first', bandwidth=None):
+        if order not in IO_ORDERS:
+            raise ValueError(f"Unknown I/O order: {order}")
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.order = order
+        self.bandwidth = bandwidth
+        self.queues = {}
+        self.buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def submit(self, path, action, on_done=None):
+        """Queue action(path) on the device holding path.
+
+        on_done(path, error) is called from the worker thread once the action
+        has run; error is None on success.
+        """
+        st = os.stat(path)
+        job = IOJob(path, st.st_size, st.st_dev, action, on_done)
+        self.queues.setdefault(st.st_dev, []).append(job)
+
+    def _ordered(self, jobs):
+        """Order one device's jobs according to the scheduling policy."""
+        if self.order == 'fifo':
+            return deque(jobs)
+        by_size = sorted(jobs, key=lambda job: job.size)
+        if self.order == 'small_first':
+            return deque(by_size)
+        # Alternate smallest and largest so big copies start early without
+        # blocking the stream of small files behind them
+        ordered = deque()
+        low, high = 0, len(by_size) - 1
+        while low <= high:
+            ordered.append(by_size[low])
+            low += 1
+            if low <= high:
+                ordered.append(by_size[high])
+                high -= 1
+        return ordered
+
+    def _worker(self, jobs, lock):
+        while True:
+            with lock:
+                if not jobs:
+                    return
+                job = jobs.popleft()
+            error = None
+            try:
+                job.action(job.path)
+            except Exception as e:
+                error = e
+            if job.on_done:
+                job.on_done(job.path, error)
+
+    def run(self):
+        """Run every queued job and block until all devices are drained."""
+        queues, self.queues = self.queues, {}
+        threads = []
+        for device, jobs in queues.items():
+            ordered = self._ordered(jobs)
+            lock = threading.Lock()
+            for _ in range(min(self.concurrency, len(ordered))):
+                thread = threading.Thread(target=self._worker, args=(ordered, lock), daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def _bucket(self, device):
+        with self._buckets_lock:
+            if device not in self.buckets:
+                self.buckets[device] = _TokenBucket(self.bandwidth)
+            return self.buckets[device]
+
+    def copy2(self, src, dst):
+        """shutil.copy2 that honours the per-device bandwidth limit."""
+        if not self.bandwidth:
+            return shutil.copy2(src, dst)
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        bucket = self._bucket(os.stat(src).st_dev)
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            while True:
+                chunk = fsrc.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                bucket.consume(len(chunk))
+                fdst.write(chunk)
+        shutil.copystat(src, dst)
+        return dst
+
+    def move(self, src, dst):
+        """shutil.move whose cross-device fallback copy is throttled too."""
+        return shutil.move(src, dst, copy_function=self.copy2)
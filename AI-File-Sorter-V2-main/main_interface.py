@@ -4,11 +4,13 @@ import shutil
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QPushButton, QLabel, QFileDialog, QRadioButton, 
                             QButtonGroup, QMessageBox, QProgressBar, QHBoxLayout,
-                            QListWidget, QListWidgetItem)
+                            QListWidget, QListWidgetItem, QComboBox, QTableView,
+                            QHeaderView, QAbstractItemView, QCheckBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
-from simple_sort import simple_sort
-from advanced_sort import ai_based_sort
+from simple_sort import simple_sort, plan_simple_sort
+from advanced_sort import ai_based_sort, FileSorter
+from preview_model import PlanTableModel, CategoryDelegate
 
 class SortingThread(QThread):
     """Thread for running the sorting process to prevent GUI freezing."""
@@ -16,17 +18,53 @@ class SortingThread(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, directory, method):
+    def __init__(self, directory, method, dedup=None, overrides=None, sorter=None,
+                 inspect_archives=False):
         super().__init__()
         self.directory = directory
         self.method = method
+        self.dedup = dedup
+        self.overrides = overrides
+        self.sorter = sorter
+        self.inspect_archives = inspect_archives
 
     def run(self):
         try:
             if self.method == 'simple':
-                simple_sort(self.directory, progress_callback=self.progress.emit)
+                simple_sort(self.directory, progress_callback=self.progress.emit, dedup=self.dedup,
+                            overrides=self.overrides)
             else:
-                ai_based_sort(self.directory, progress_callback=self.progress.emit)
+                ai_based_sort(self.directory, progress_callback=self.progress.emit, dedup=self.dedup,
+                              overrides=self.overrides, sorter=self.sorter,
+                              inspect_archives=self.inspect_archives)
+            self.finished.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+class PreviewThread(QThread):
+    """Thread that streams planned filename -> category results without moving files."""
+    rows = pyqtSignal(list)
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, directory, method, inspect_archives=False):
+        super().__init__()
+        self.directory = directory
+        self.method = method
+        self.inspect_archives = inspect_archives
+        self.sorter = None
+
+    def run(self):
+        try:
+            if self.method == 'simple':
+                batches = plan_simple_sort(self.directory)
+            else:
+                # Kept so the sort can reuse the trained model
+                self.sorter = FileSorter()
+                batches = self.sorter.iter_plan(self.directory,
+                                                inspect_archives=self.inspect_archives)
+            for batch in batches:
+                self.rows.emit(batch)
             self.finished.emit()
         except Exception as e:
             self.error.emit(str(e))
@@ -36,12 +74,14 @@ class FileOrganizerGUI(QMainWindow):
         super().__init__()
         self.init_ui()
         self.sorting_thread = None
+        self.preview_thread = None
+        self.preview_key = None  # (directory, method) the preview was built for
         self.current_directory = None
         self.backup_dirs = []
 
     def init_ui(self):
         self.setWindowTitle('AI File Organizer')
-        self.setGeometry(100, 100, 800, 600)
+        self.setGeometry(100, 100, 900, 800)
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #f0f0f0;
@@ -93,6 +133,11 @@ class FileOrganizerGUI(QMainWindow):
             QListWidget::item:selected {
                 background-color: #e0e0e0;
             }
+            QTableView {
+                background-color: white;
+                border: 1px solid #ccc;
+                border-radius: 4px;
+            }
         """)
 
         # Create central widget and layout
@@ -121,9 +166,9 @@ class FileOrganizerGUI(QMainWindow):
         self.dir_label.setStyleSheet("padding: 10px; background-color: white; border-radius: 4px;")
         layout.addWidget(self.dir_label)
 
-        select_btn = QPushButton("Select Folder to Organize")
-        select_btn.clicked.connect(self.select_directory)
-        layout.addWidget(select_btn)
+        self.select_btn = QPushButton("Select Folder to Organize")
+        self.select_btn.clicked.connect(self.select_directory)
+        layout.addWidget(self.select_btn)
 
         # Sorting method selection
         method_group = QButtonGroup(self)
@@ -132,12 +177,57 @@ class FileOrganizerGUI(QMainWindow):
         method_group.addButton(self.simple_rb)
         method_group.addButton(self.advanced_rb)
         self.simple_rb.setChecked(True)
+        self.simple_rb.toggled.connect(self.clear_preview)
         
         method_layout = QVBoxLayout()
         method_layout.addWidget(self.simple_rb)
         method_layout.addWidget(self.advanced_rb)
         layout.addLayout(method_layout)
 
+        # Duplicate handling
+        self.dedup_combo = QComboBox()
+        self.dedup_combo.addItem("Keep duplicate files", None)
+        self.dedup_combo.addItem("Skip duplicate files", 'skip')
+        self.dedup_combo.addItem("Replace duplicates with links", 'link')
+        self.dedup_combo.addItem("Move duplicates to 'duplicates' folder", 'move')
+        layout.addWidget(self.dedup_combo)
+
+        # Archive inspection (AI sort only)
+        self.archives_cb = QCheckBox("Sort zip/tar archives by their contents (AI sort)")
+        self.archives_cb.toggled.connect(self.clear_preview)
+        layout.addWidget(self.archives_cb)
+
+        # Preview of planned moves
+        preview_btn_layout = QHBoxLayout()
+        self.preview_btn = QPushButton("Preview Moves")
+        self.preview_btn.clicked.connect(self.start_preview)
+        self.preview_btn.setEnabled(False)
+        self.filter_combo = QComboBox()
+        self.filter_combo.addItem("All categories", None)
+        self.filter_combo.currentIndexChanged.connect(self.apply_preview_filter)
+        preview_btn_layout.addWidget(self.preview_btn)
+        preview_btn_layout.addWidget(self.filter_combo)
+        layout.addLayout(preview_btn_layout)
+
+        self.preview_model = PlanTableModel(self)
+        self.preview_table = QTableView()
+        self.preview_table.setModel(self.preview_model)
+        self.preview_table.setItemDelegateForColumn(1, CategoryDelegate(self.preview_model, self))
+        # Keep arrival order until a header is clicked
+        self.preview_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.preview_table.setSortingEnabled(True)
+        self.preview_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.preview_table.setEditTriggers(QAbstractItemView.DoubleClicked |
+                                           QAbstractItemView.SelectedClicked)
+        # Fixed row heights so the view never measures a million rows
+        self.preview_table.verticalHeader().setVisible(False)
+        self.preview_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_table.verticalHeader().setDefaultSectionSize(24)
+        self.preview_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.preview_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
+        self.preview_table.setMinimumHeight(200)
+        layout.addWidget(self.preview_table)
+
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -188,6 +278,8 @@ class FileOrganizerGUI(QMainWindow):
             self.current_directory = directory
             self.dir_label.setText(f"Selected: {directory}")
             self.start_btn.setEnabled(True)
+            self.preview_btn.setEnabled(True)
+            self.clear_preview()
             self.status_label.setText("Ready to organize files")
             self.refresh_backups()
 
@@ -232,21 +324,85 @@ class FileOrganizerGUI(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to delete backup: {str(e)}")
 
+    def selected_method(self):
+        return 'simple' if self.simple_rb.isChecked() else 'advanced'
+
+    def set_controls_enabled(self, enabled):
+        """Lock the inputs a running preview or sort depends on."""
+        for widget in (self.select_btn, self.simple_rb, self.advanced_rb, self.archives_cb,
+                       self.preview_btn, self.start_btn):
+            widget.setEnabled(enabled)
+
+    def clear_preview(self):
+        """Drop a preview that no longer matches the directory or method."""
+        self.preview_key = None
+        self.preview_model.clear()
+        self.filter_combo.blockSignals(True)
+        self.filter_combo.clear()
+        self.filter_combo.addItem("All categories", None)
+        self.filter_combo.blockSignals(False)
+        self.preview_model.set_filter(None)
+
+    def start_preview(self):
+        if not self.current_directory:
+            return
+        method = self.selected_method()
+        self.clear_preview()
+        # Changing the directory or method mid-preview would mix in stale rows
+        self.set_controls_enabled(False)
+        self.status_label.setText("Classifying files for preview...")
+
+        self.preview_thread = PreviewThread(self.current_directory, method,
+                                            self.archives_cb.isChecked())
+        self.preview_thread.rows.connect(self.preview_model.append_rows)
+        self.preview_thread.finished.connect(self.preview_finished)
+        self.preview_thread.error.connect(self.preview_error)
+        self.preview_key = (self.current_directory, method)
+        self.preview_thread.start()
+
+    def preview_finished(self):
+        self.preview_model.finish_streaming()
+        self.filter_combo.blockSignals(True)
+        for category in sorted(self.preview_model.category_counts):
+            count = self.preview_model.category_counts[category]
+            self.filter_combo.addItem(f"{category} ({count})", category)
+        self.filter_combo.blockSignals(False)
+        self.set_controls_enabled(True)
+        self.status_label.setText(f"Preview ready: {self.preview_model.total_rows()} files. "
+                                  "Double-click a category to change it before organizing.")
+
+    def preview_error(self, error_message):
+        self.clear_preview()
+        self.set_controls_enabled(True)
+        QMessageBox.critical(self, "Error", f"Preview failed: {error_message}")
+
+    def apply_preview_filter(self):
+        self.preview_model.set_filter(self.filter_combo.currentData())
+
     def start_sorting(self):
         if not hasattr(self, 'current_directory'):
             QMessageBox.warning(self, "Error", "Please select a directory first.")
             return
 
-        method = 'simple' if self.simple_rb.isChecked() else 'advanced'
+        method = self.selected_method()
+
+        # Reuse the preview's overrides (and trained model) when it matches
+        overrides, sorter = None, None
+        if self.preview_key == (self.current_directory, method):
+            overrides = self.preview_model.overrides()
+            sorter = self.preview_thread.sorter
         
         # Disable UI elements during sorting
-        self.start_btn.setEnabled(False)
+        self.set_controls_enabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         self.status_label.setText("Initializing...")
 
         # Start sorting in a separate thread
-        self.sorting_thread = SortingThread(self.current_directory, method)
+        self.sorting_thread = SortingThread(self.current_directory, method,
+                                            self.dedup_combo.currentData(),
+                                            overrides=overrides, sorter=sorter,
+                                            inspect_archives=self.archives_cb.isChecked())
         self.sorting_thread.progress.connect(self.update_status)
         self.sorting_thread.finished.connect(self.sorting_finished)
         self.sorting_thread.error.connect(self.sorting_error)
@@ -263,13 +419,14 @@ class FileOrganizerGUI(QMainWindow):
 
     def sorting_finished(self):
         self.progress_bar.setVisible(False)
-        self.start_btn.setEnabled(True)
+        self.set_controls_enabled(True)
+        self.clear_preview()  # The files have moved, so the plan is stale
         self.refresh_backups()  # Refresh backup list after sorting
         QMessageBox.information(self, "Success", "File organization completed successfully!")
 
     def sorting_error(self, error_message):
         self.progress_bar.setVisible(False)
-        self.start_btn.setEnabled(True)
+        self.set_controls_enabled(True)
         QMessageBox.critical(self, "Error", f"An error occurred: {error_message}")
 
 def main():
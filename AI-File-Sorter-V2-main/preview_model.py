@@ -0,0 +1,193 @@
+"""
+Table model for previewing planned moves in the GUI.
+
+Rows live in plain Python lists and the view only ever sees index ranges of
+them: rows are exposed in fetch-sized chunks, while sorting and filtering work
+on an index list. This keeps the preview responsive with a million files.
+"""
+
+import os
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtWidgets import QStyledItemDelegate, QComboBox
+from retry_queue import RETRY_REPORT_DIR
+
+FETCH_BATCH = 2000
+ALL_CATEGORIES = None
+RESERVED_PREFIXES = ('backup_', RETRY_REPORT_DIR)  # Folders the sorters manage themselves
+
+
+def is_valid_category(value):
+    """Return True if value names a single folder directly inside the source directory."""
+    if value == '.' or '..' in value or os.path.isabs(value):
+        return False
+    if any(sep in value for sep in ('/', '\\', os.sep)):
+        return False
+    return not value.startswith(RESERVED_PREFIXES)
+
+
+class PlanTableModel(QAbstractTableModel):
+    """Filename -> category plan with lazy fetching, sorting, filtering and overrides."""
+
+    COLUMNS = ('Filename', 'Category')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filenames = []
+        self._categories = []
+        self._overrides = {}  # row -> user-chosen category
+        self._view = []       # row indices in display order after filter/sort
+        self._fetched = 0
+        self._filter = ALL_CATEGORIES
+        self._sort = None     # (column, order) or None for arrival order
+        self.category_counts = {}
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._view[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._filenames[row] if index.column() == 0 else self.category(row)
+        if index.column() == 1 and row in self._overrides:
+            # Highlight rows the user has changed
+            if role == Qt.FontRole:
+                font = QFont()
+                font.setBold(True)
+                return font
+            if role == Qt.ForegroundRole:
+                return QColor('#2e7d32')
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 1:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.column() != 1:
+            return False
+        value = str(value).strip()
+        if not value or not is_valid_category(value):
+            return False
+        row = self._view[index.row()]
+        if value == self._categories[row]:
+            self._overrides.pop(row, None)
+        else:
+            self._overrides[row] = value
+        self.category_counts.setdefault(value, 0)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < len(self._view)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_BATCH, len(self._view) - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort = (column, order) if column >= 0 else None
+        self._rebuild_view()
+
+    # Plan management
+
+    def category(self, row):
+        """Effective category of a row, including user overrides."""
+        return self._overrides.get(row, self._categories[row])
+
+    def clear(self):
+        self.beginResetModel()
+        self._filenames = []
+        self._categories = []
+        self._overrides = {}
+        self._view = []
+        self._fetched = 0
+        self.category_counts = {}
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Append a streamed batch of (filename, category) results."""
+        start = len(self._filenames)
+        for filename, category in rows:
+            self._filenames.append(filename)
+            self._categories.append(category)
+            self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        new_rows = range(start, len(self._filenames))
+        if self._filter is not ALL_CATEGORIES:
+            new_rows = [r for r in new_rows if self._categories[r] == self._filter]
+        self._view.extend(new_rows)
+        # Keep the first screenful populated; the rest is fetched on scroll
+        if self._fetched < FETCH_BATCH:
+            self.fetchMore()
+
+    def finish_streaming(self):
+        """Apply a pending sort once all results have arrived."""
+        if self._sort is not None:
+            self._rebuild_view()
+
+    def set_filter(self, category):
+        """Show only rows with the given effective category (None for all)."""
+        self._filter = category
+        self._rebuild_view()
+
+    def _rebuild_view(self):
+        self.beginResetModel()
+        if self._filter is ALL_CATEGORIES:
+            view = list(range(len(self._filenames)))
+        else:
+            view = [r for r in range(len(self._filenames)) if self.category(r) == self._filter]
+        if self._sort is not None:
+            column, order = self._sort
+            if column == 0:
+                key = self._filenames.__getitem__
+            else:
+                key = self.category
+            view.sort(key=key, reverse=(order == Qt.DescendingOrder))
+        self._view = view
+        self._fetched = min(FETCH_BATCH, len(view))
+        self.endResetModel()
+
+    def overrides(self):
+        """Return {filename: category} for every row the user changed."""
+        return {self._filenames[row]: category for row, category in self._overrides.items()}
+
+    def total_rows(self):
+        return len(self._filenames)
+
+
+class CategoryDelegate(QStyledItemDelegate):
+    """Editable combo box offering the known categories for overrides."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.setEditable(True)
+        editor.addItems(sorted(self.model.category_counts))
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
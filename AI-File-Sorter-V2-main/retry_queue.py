@@ -0,0 +1,162 @@
+"""
+Retry handling for file operations that fail for temporary reasons.
+
+A file that is locked, still being written or on a share that briefly drops
+out is deferred to the end of the run and retried with exponential backoff.
+Errors that cannot go away by waiting fail immediately. Whatever still fails
+is written to a retry report, so a later run can re-process just those files:
+moving the ones that never moved, and backing up the ones that only lost
+their backup copy.
+"""
+
+import os
+import json
+import time
+import errno
+import heapq
+import threading
+from datetime import datetime
+
+RETRY_REPORT_DIR = '.sorter_retry'
+
+# errno values that usually clear up on their own. EACCES is left out: it is
+# a real permission error, and Windows sharing violations are matched by
+# winerror below instead.
+TRANSIENT_ERRNOS = {
+    errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT,
+    errno.ENOLCK, errno.ETXTBSY, errno.ECONNRESET, errno.ECONNABORTED,
+    errno.EHOSTUNREACH, errno.ENETUNREACH, errno.ENETDOWN,
+}
+for _name in ('ESTALE', 'EDEADLK'):
+    if hasattr(errno, _name):
+        TRANSIENT_ERRNOS.add(getattr(errno, _name))
+
+# Windows sharing and lock violations (file open in another program)
+TRANSIENT_WINERRORS = {32, 33}
+
+
+def is_transient(error):
+    """Return True if waiting and retrying could make the error go away."""
+    if isinstance(error, (FileNotFoundError, FileExistsError, IsADirectoryError,
+                          NotADirectoryError)):
+        return False
+    if isinstance(error, (BlockingIOError, InterruptedError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, OSError):
+        if getattr(error, 'winerror', None) in TRANSIENT_WINERRORS:
+            return True
+        return error.errno in TRANSIENT_ERRNOS
+    return False
+
+
+class RetryQueue:
+    """Defers transiently failed operations and retries them with backoff.
+
+    Delays grow as base_delay * 2 ** (attempt - 1), capped at max_delay, and
+    an operation is given up after max_attempts attempts in total.
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=10.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts = {}
+        self.failures = []
+        self.retried = 0
+        self._pending = []  # heap of (due_time, sequence, path, action, on_done, locate)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def handler(self, action, on_done, progress_callback=None, locate=None):
+        """Wrap on_done(path, error) so transient errors are deferred first.
+
+        locate(path) returns where the file now is once it has been moved, or
+        None, so a failure can be reported as a failed move or a missing backup.
+        """
+        def handle(path, error):
+            if error and self._defer(path, action, on_done, error, locate):
+                if progress_callback:
+                    progress_callback(f"Retrying later: {os.path.basename(path)} ({str(error)})")
+                return
+            on_done(path, error)
+        return handle
+
+    def _defer(self, path, action, on_done, error, locate=None):
+        """Schedule a retry, or record a final failure and return False."""
+        with self._lock:
+            attempts = self.attempts.get(path, 0) + 1
+            self.attempts[path] = attempts
+            transient = is_transient(error)
+            if transient and attempts < self.max_attempts:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+                self._sequence += 1
+                heapq.heappush(self._pending,
+                               (time.monotonic() + delay, self._sequence, path, action,
+                                on_done, locate))
+                return True
+            current_path = locate(path) if locate else None
+            self.failures.append({
+                'filename': os.path.basename(path),
+                'path': path,
+                'step': 'backup' if current_path else 'move',
+                'current_path': current_path or path,
+                'attempts': attempts,
+                'kind': 'transient' if transient else 'permanent',
+                'error': str(error),
+            })
+            return False
+
+    def run(self, progress_callback=None):
+        """Retry deferred operations until each succeeds or runs out of attempts."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                due, _, path, action, on_done, locate = heapq.heappop(self._pending)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.retried += 1
+            try:
+                action(path)
+            except Exception as e:
+                if self._defer(path, action, on_done, e, locate):
+                    continue
+                on_done(path, e)
+            else:
+                on_done(path, None)
+
+    def summary(self):
+        """One-line summary for progress output."""
+        return (f"Retries: {self.retried} attempted, "
+                f"{len(self.failures)} files still failing")
+
+    def write_report(self, source_dir):
+        """Write failures to a JSON report under source_dir and return its path.
+
+        The report lives in a folder, which the sorters never pick up as a file.
+        """
+        report_dir = os.path.join(source_dir, RETRY_REPORT_DIR)
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"retry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'source_dir': source_dir, 'failures': self.failures}, f, indent=2)
+        return path
+
+
+def load_retry_report(report_path):
+    """Return (source_dir, filenames, backup_paths) from a retry report.
+
+    filenames are files whose move failed and still sit in source_dir, to be
+    passed as only_files; backup_paths are files that were sorted but never
+    backed up, to be passed as backup_only.
+    """
+    with open(report_path, encoding='utf-8') as f:
+        report = json.load(f)
+    filenames, backup_paths = [], []
+    for failure in report['failures']:
+        if failure.get('step') == 'backup':
+            backup_paths.append(failure['current_path'])
+        else:
+            filenames.append(failure['filename'])
+    return report['source_dir'], filenames, backup_paths
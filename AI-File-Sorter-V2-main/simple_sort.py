@@ -1,13 +1,18 @@
 import os
-import shutil
+import threading
 from datetime import datetime
+from dedup import DuplicateStage
+from io_scheduler import IOScheduler
+from retry_queue import RetryQueue
+from category_tables import split_extension
 
 def get_file_type(file_path):
     """Get the file type based on extension."""
-    ext = os.path.splitext(file_path)[1].lower()
+    # Shared tables keep multi-part suffixes such as tar.gz together
+    ext = split_extension(os.path.basename(file_path))
     if not ext:
         return 'other'
-    return ext[1:]  # Remove the dot
+    return ext
 
 def create_type_folder(root_dir, file_type):
     """Create a folder for the file type if it doesn't exist."""
@@ -15,49 +20,137 @@ def create_type_folder(root_dir, file_type):
     os.makedirs(type_folder, exist_ok=True)
     return type_folder
 
-def simple_sort(root_directory, progress_callback=None):
-    """Organize files by their type (extension)."""
+def plan_simple_sort(root_directory, batch_size=1000):
+    """Yield batches of (filename, file type) without moving anything."""
+    batch = []
+    with os.scandir(root_directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                batch.append((entry.name, get_file_type(entry.name)))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+def simple_sort(root_directory, progress_callback=None, dedup=None, scheduler=None,
+                overrides=None, retry_queue=None, only_files=None, backup_only=None):
+    """Organize files by their type (extension).
+
+    dedup selects an optional duplicate policy: 'link', 'skip' or 'move'.
+    scheduler is an optional IOScheduler controlling move/backup I/O.
+    overrides maps filenames to folder names chosen by the user.
+    retry_queue is an optional RetryQueue for locked or busy files.
+    only_files restricts the run to these filenames (e.g. from a retry report).
+    backup_only lists paths of already sorted files that still need a backup copy.
+    """
+    overrides = overrides or {}
     if not os.path.isdir(root_directory):
         raise ValueError(f"Directory not found: {root_directory}")
     
     # Get all files in the directory
     files = [f for f in os.listdir(root_directory) 
              if os.path.isfile(os.path.join(root_directory, f))]
+    if only_files is not None:
+        only_files = set(only_files)
+        files = [f for f in files if f in only_files]
+    backup_only = [p for p in backup_only or [] if os.path.isfile(p)]
     
-    if not files:
+    if not files and not backup_only:
         if progress_callback:
             progress_callback("No files found to organize.")
         return
     
+    # Set byte-identical copies aside before anything is moved
+    dedup_stage = None
+    if dedup:
+        dedup_stage = DuplicateStage(dedup)
+        files = dedup_stage.scan(root_directory, files)
+        if progress_callback:
+            progress_callback(f"Found {len(dedup_stage.duplicates)} duplicate files")
+    
     # Create a timestamped backup folder
     backup_dir = os.path.join(root_directory, f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
     os.makedirs(backup_dir, exist_ok=True)
     
     total_files = len(files)
     processed_files = 0
+    destinations = {}
+    progress_lock = threading.Lock()
     
-    # Organize files
-    for filename in files:
-        try:
-            file_path = os.path.join(root_directory, filename)
-            file_type = get_file_type(filename)
-            
-            # Create type folder and move file
-            type_folder = create_type_folder(root_directory, file_type)
-            shutil.move(file_path, os.path.join(type_folder, filename))
-            
-            # Create backup
-            shutil.copy2(os.path.join(type_folder, filename), 
+    def move_file(file_path):
+        """Move one file into its type folder and back it up."""
+        filename = os.path.basename(file_path)
+        type_folder = create_type_folder(root_directory, overrides.get(filename) or get_file_type(filename))
+        # A retry may find the move already done and only the backup missing
+        if filename not in destinations:
+            scheduler.move(file_path, os.path.join(type_folder, filename))
+            destinations[filename] = os.path.join(type_folder, filename)
+        
+        # Create backup
+        scheduler.copy2(os.path.join(type_folder, filename),
                         os.path.join(backup_dir, filename))
-            
+    
+    def file_done(file_path, error):
+        """Report a finished move from whichever I/O worker ran it."""
+        nonlocal processed_files
+        filename = os.path.basename(file_path)
+        with progress_lock:
+            if error:
+                if progress_callback:
+                    progress_callback(f"! Failed to organize {filename}: {str(error)}")
+                return
             processed_files += 1
             if progress_callback:
                 progress = (processed_files / total_files) * 100
+                file_type = overrides.get(filename) or get_file_type(filename)
                 progress_callback(f"Organizing: {filename} -> {file_type}/ ({int(progress)}%)")
-            
-        except Exception as e:
+    
+    def backup_file(file_path):
+        """Back up a file that an earlier run sorted without a backup."""
+        scheduler.copy2(file_path, os.path.join(backup_dir, os.path.basename(file_path)))
+    
+    def backup_done(file_path, error):
+        """Report a finished backup-only copy."""
+        filename = os.path.basename(file_path)
+        with progress_lock:
             if progress_callback:
-                progress_callback(f"! Failed to organize {filename}: {str(e)}")
+                if error:
+                    progress_callback(f"! Failed to back up {filename}: {str(error)}")
+                else:
+                    progress_callback(f"Backed up: {filename}")
+    
+    # Organize files, scheduled per device with small files first
+    scheduler = scheduler or IOScheduler()
+    retry_queue = retry_queue or RetryQueue()
+    move_done = retry_queue.handler(move_file, file_done, progress_callback,
+                                    lambda path: destinations.get(os.path.basename(path)))
+    copy_done = retry_queue.handler(backup_file, backup_done, progress_callback,
+                                    lambda path: path)
+    for file_path in backup_only:
+        try:
+            scheduler.submit(file_path, backup_file, copy_done)
+        except Exception as e:
+            copy_done(file_path, e)
+    for filename in files:
+        file_path = os.path.join(root_directory, filename)
+        try:
+            scheduler.submit(file_path, move_file, move_done)
+        except Exception as e:
+            move_done(file_path, e)
+    scheduler.run()
+    
+    # Locked or busy files get another go once everything else is done
+    retry_queue.run(progress_callback)
+    if retry_queue.failures:
+        report_path = retry_queue.write_report(root_directory)
+        if progress_callback:
+            progress_callback(f"{retry_queue.summary()}; retry report: {report_path}")
+    
+    if dedup_stage:
+        dedup_stage.finish(root_directory, destinations, progress_callback)
+        if progress_callback:
+            progress_callback(dedup_stage.summary())
     
     if progress_callback:
         progress_callback(f"✓ Organization complete! Backup created in: {backup_dir}")
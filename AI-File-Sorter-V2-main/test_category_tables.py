@@ -0,0 +1,66 @@
+import pytest
+from category_tables import (
+    EXTENSION_CATEGORIES,
+    extension_categories,
+    extension_category,
+    split_extension,
+)
+from file_categories import COMPOUND_EXTENSIONS, TRAINING_EXAMPLES
+from simple_sort import get_file_type
+
+
+@pytest.mark.parametrize('filename, expected', [
+    ('data.csv', ('spreadsheets', 'data')),
+    ('index.html', ('code', 'web')),
+    ('banner.psd', ('design', 'images')),
+    ('installer.dmg', ('archives', 'executables')),
+    ('scene.blend', ('design', '3d_models', 'game')),
+    ('slides.key', ('presentations', 'security')),
+    ('app.js', ('web', 'code')),
+    ('release.apk', ('mobile', 'executables')),
+])
+def test_ambiguous_extensions_are_ranked(filename, expected):
+    assert extension_categories(filename) == expected
+    assert extension_category(filename) == expected[0]
+
+
+@pytest.mark.parametrize('filename, suffix, category', [
+    ('x.tar.gz', 'tar.gz', 'archives'),
+    ('Backup.TAR.BZ2', 'tar.bz2', 'archives'),
+    ('my.compose.yml', 'compose.yml', 'container'),
+    ('app.compose.yaml', 'compose.yaml', 'container'),
+])
+def test_multi_part_suffixes(filename, suffix, category):
+    assert split_extension(filename) == suffix
+    assert extension_category(filename) == category
+
+
+@pytest.mark.parametrize('filename, suffix', [
+    ('compose.yaml', 'yaml'),
+    ('compose.yml', 'yml'),
+    ('tar.gz', 'gz'),
+    ('docker-compose.yml', 'yml'),
+])
+def test_bare_compound_name_falls_back_to_last_suffix(filename, suffix):
+    assert split_extension(filename) == suffix
+    assert get_file_type(filename) == suffix
+
+
+@pytest.mark.parametrize('filename', ['README', '.bashrc', 'trailing.'])
+def test_names_without_extension(filename):
+    assert split_extension(filename) == ''
+    assert extension_category(filename) is None
+    assert get_file_type(filename) == 'other'
+
+
+def test_tables_are_read_only():
+    with pytest.raises(TypeError):
+        EXTENSION_CATEGORIES['csv'] = ('data',)
+
+
+def test_compound_suffixes_agree_with_training_labels():
+    compounds = {ext for extensions in COMPOUND_EXTENSIONS.values() for ext in extensions}
+    for filename, category in TRAINING_EXAMPLES:
+        suffix = split_extension(filename)
+        if suffix in compounds:
+            assert category in EXTENSION_CATEGORIES[suffix], filename
@@ -0,0 +1,92 @@
+import os
+import json
+import socket
+import tempfile
+import threading
+import pytest
+from advanced_sort import FileSorter
+from classify_service import ClassificationServer, ClassificationService, ServiceClient
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+
+
+@pytest.fixture(scope='module')
+def sorter():
+    return FileSorter()
+
+
+@pytest.fixture
+def server(sorter):
+    # Short directory: Unix socket paths are limited to about 100 bytes
+    with tempfile.TemporaryDirectory() as directory:
+        server = ClassificationServer(ClassificationService(sorter),
+                                      socket_path=os.path.join(directory, 'sorter.sock'))
+        server.start()
+        yield server
+        server.stop()
+
+
+def test_classify_matches_sorter(server, sorter):
+    filenames = ['report.pdf', 'holiday photo.jpg', 'main.py', 'quarterly_budget_final']
+    expected = [sorter._classify(f)[0] for f in filenames]
+    with ServiceClient(server.address) as client:
+        assert client.classify(filenames) == expected
+        assert client.classify([]) == []
+
+
+def test_health_and_stats(server):
+    with ServiceClient(server.address) as client:
+        assert client.health()['status'] == 'ok'
+        client.classify(['a.txt', 'b.txt', 'a.txt'])
+        stats = client.stats()
+    assert stats['requests'] == 3
+    assert stats['batches'] >= 1
+    assert stats['classified'] >= 2
+    assert set(stats['stages']) <= {'extension', 'keyword', 'ml', 'fallback'}
+
+
+def test_error_responses_keep_connection_open(server):
+    with ServiceClient(server.address) as client:
+        with pytest.raises(RuntimeError, match='Unknown op'):
+            client.request(op='explode')
+        with pytest.raises(RuntimeError, match='list of strings'):
+            client.request(op='classify', filenames='report.pdf')
+        with pytest.raises(RuntimeError, match="'directory' is required"):
+            client.request(op='sort')
+        client.file.write(b'{not json\n')
+        client.file.flush()
+        assert json.loads(client.file.readline())['ok'] is False
+        assert client.health()['ok']
+
+
+def test_concurrent_clients(server):
+    errors = []
+
+    def run(i):
+        try:
+            with ServiceClient(server.address) as client:
+                assert client.classify([f'file{i}.txt', 'notes.md']) == ['documents'] * 2
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_socket_removed_on_stop(sorter):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sorter.sock')
+        server = ClassificationServer(ClassificationService(sorter), socket_path=path).start()
+        assert os.path.exists(path)
+        server.stop()
+        assert not os.path.exists(path)
+
+
+def test_refuses_to_replace_regular_file(sorter):
+    with tempfile.NamedTemporaryFile() as f:
+        with pytest.raises(FileExistsError):
+            ClassificationServer(ClassificationService(sorter), socket_path=f.name)
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from advanced_sort import FileSorter
+from evaluate import generate_variants
+from file_categories import TRAINING_EXAMPLES
+
+
+@pytest.fixture(scope='module')
+def sorter():
+    return FileSorter()
+
+
+@pytest.fixture(scope='module')
+def filenames(sorter):
+    names = set(sorter.file_names)
+    for filename, _ in TRAINING_EXAMPLES:
+        names.update(generate_variants(filename))
+    names.update(['', 'README', '.bashrc', 'IMG_0001 (3).JPEG', 'q3 report final v2.xlsx'])
+    return sorted(names)
+
+
+def test_predictions_match_sklearn(sorter, filenames):
+    X = sorter.vectorizer.transform(filenames)
+    assert sorter.model.classes == list(sorter.clf.classes_)
+    assert sorter.model.predict(filenames) == list(sorter.clf.predict(X))
+    np.testing.assert_array_equal(sorter.model.predict_proba(filenames), sorter.clf.predict_proba(X))
+
+
+def test_export_round_trip(sorter, filenames, tmp_path):
+    path = tmp_path / 'model.npz'
+    sorter.export_model(path)
+    loaded = FileSorter(model_path=str(path))
+    assert loaded.clf is None
+    assert loaded.model.predict(filenames) == sorter.model.predict(filenames)
+    np.testing.assert_array_equal(loaded.model.predict_proba(filenames),
+                                  sorter.model.predict_proba(filenames))
+
+
+def test_compiled_model_does_not_import_sklearn(sorter, tmp_path):
+    path = tmp_path / 'model.npz'
+    sorter.export_model(path)
+    script = (
+        "import sys\n"
+        "from advanced_sort import FileSorter\n"
+        f"FileSorter(model_path={str(path)!r}).predict_category('quarterly_budget_final')\n"
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'sklearn', 'scipy'}))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == '[]'